@@ -1,4 +1,6 @@
 def script_function():    
+    import aiohttp
+    
     # Initialize default config values
     if getConfigData().get("dm_logger_enabled") is None:
         updateConfigData("dm_logger_enabled", True)
@@ -7,14 +9,23 @@ def script_function():
     if getConfigData().get("embed_color") is None:
         updateConfigData("embed_color", "5865F2")
     
-    # --- Asynchronous Helper for requests ---
-    async def run_in_thread(func, *args, **kwargs):
-        """Runs a synchronous function in a separate thread."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+    # --- Shared HTTP Session ---
+    # Created on first use so it binds to the running event loop. Left open
+    # until the process exits, since scripts get no unload hook; the connector
+    # drops idle sockets after its keep-alive timeout
+    http_state = {"session": None}
+    
+    async def get_http_session():
+        """Returns the shared aiohttp session, creating it if needed."""
+        if http_state["session"] is None or http_state["session"].closed:
+            http_state["session"] = aiohttp.ClientSession(
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return http_state["session"]
     
     # --- Webhook Sending Function ---
-    def send_webhook_message(webhook_url: str, embed_data: dict = None, content: str = None) -> bool:
+    async def send_webhook_message(webhook_url: str, embed_data: dict = None, content: str = None) -> bool:
         """
         Sends a message or embed to a Discord webhook.
         
@@ -34,20 +45,17 @@ def script_function():
         if embed_data:
             payload["embeds"] = [embed_data]
 
-        headers = {"Content-Type": "application/json"}
-
         try:
-            response = requests.post(webhook_url, headers=headers, data=json.dumps(payload), timeout=10)
-            response.raise_for_status()
-
-            if response.status_code == 204:
-                print("DM logged to webhook successfully.", type_="INFO")
-                return True
-            else:
-                print(f"Webhook returned unexpected status: {response.status_code}", type_="ERROR")
-                return False
-
-        except requests.exceptions.RequestException as e:
+            session = await get_http_session()
+            async with session.post(webhook_url, data=json.dumps(payload)) as response:
+                if response.status == 204:
+                    print("DM logged to webhook successfully.", type_="INFO")
+                    return True
+                else:
+                    print(f"Webhook returned unexpected status: {response.status}", type_="ERROR")
+                    return False
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             print(f"Error sending DM log to webhook: {e}", type_="ERROR")
             return False
         except Exception as e:
@@ -110,7 +118,7 @@ def script_function():
             
             # Send to webhook asynchronously
             try:
-                await run_in_thread(send_webhook_message, webhook_url, embed_data)
+                await send_webhook_message(webhook_url, embed_data)
             except Exception as e:
                 print(f"Failed to send DM log to webhook: {e}", type_="ERROR")
 
@@ -385,27 +385,8 @@ def ping_afk_system():
         except ValueError:
             await ctx.send("> Invalid number. Please provide a valid cooldown in seconds.", delete_after=5)
     
-    # Command: Help
-    @bot.command(
-        name="pinghelp",
-        aliases=["afkhelp"],
-        description="Show all available commands and settings"
-    )
-    async def show_help(ctx, *, args: str = ""):
-        await ctx.message.delete()
-        
-        prefix = getConfigData().get("prefix", ".")
-        
-        afk_enabled = getConfigData().get(f"{CONFIG_PREFIX}afk_enabled", False)
-        afk_message = getConfigData().get(f"{CONFIG_PREFIX}afk_message", "I'm currently AFK")
-        afk_delay = getConfigData().get(f"{CONFIG_PREFIX}afk_delay", 0)
-        afk_typing = getConfigData().get(f"{CONFIG_PREFIX}afk_typing", True)
-        afk_typing_length = getConfigData().get(f"{CONFIG_PREFIX}afk_typing_length", 2)
-        afk_reply = getConfigData().get(f"{CONFIG_PREFIX}afk_reply", True)
-        afk_server = getConfigData().get(f"{CONFIG_PREFIX}afk_server", True)
-        afk_cooldown = getConfigData().get(f"{CONFIG_PREFIX}afk_cooldown", 60)
-        
-        help_content = f"""# Ping Tracker & AFK System Help
+    # Static help layout, built once; only the settings are filled in per call
+    HELP_TEMPLATE = """# Ping Tracker & AFK System Help
 
 ## Ping Commands
 
@@ -414,12 +395,12 @@ def ping_afk_system():
 
 ## Current Settings
 
-> **AFK Status:** {'Enabled' if afk_enabled else 'Disabled'}
+> **AFK Status:** {afk_enabled}
 > **AFK Message:** {afk_message}
 > **Response Delay:** {afk_delay} seconds
-> **Typing Indicator:** {'Enabled' if afk_typing else 'Disabled'} ({afk_typing_length}s)
-> **Auto-Reply:** {'Enabled' if afk_reply else 'Disabled'}
-> **Server Responses:** {'Enabled' if afk_server else 'Disabled'}
+> **Typing Indicator:** {afk_typing} ({afk_typing_length}s)
+> **Auto-Reply:** {afk_reply}
+> **Server Responses:** {afk_server}
 > **Response Cooldown:** {afk_cooldown} seconds
 
 ## AFK Commands
@@ -432,6 +413,38 @@ def ping_afk_system():
 > **{prefix}afkr <true/false>** - Enable/disable auto-replies
 > **{prefix}afks <true/false>** - Enable/disable server responses
 > **{prefix}afkc <seconds>** - Set cooldown between responses"""
+    
+    # Command: Help
+    @bot.command(
+        name="pinghelp",
+        aliases=["afkhelp"],
+        description="Show all available commands and settings"
+    )
+    async def show_help(ctx, *, args: str = ""):
+        await ctx.message.delete()
+        
+        prefix = getConfigData().get("prefix", ".")
+        
+        afk_enabled = getConfigData().get(f"{CONFIG_PREFIX}afk_enabled", False)
+        afk_message = getConfigData().get(f"{CONFIG_PREFIX}afk_message", "I'm currently AFK")
+        afk_delay = getConfigData().get(f"{CONFIG_PREFIX}afk_delay", 0)
+        afk_typing = getConfigData().get(f"{CONFIG_PREFIX}afk_typing", True)
+        afk_typing_length = getConfigData().get(f"{CONFIG_PREFIX}afk_typing_length", 2)
+        afk_reply = getConfigData().get(f"{CONFIG_PREFIX}afk_reply", True)
+        afk_server = getConfigData().get(f"{CONFIG_PREFIX}afk_server", True)
+        afk_cooldown = getConfigData().get(f"{CONFIG_PREFIX}afk_cooldown", 60)
+        
+        help_content = HELP_TEMPLATE.format(
+            prefix=prefix,
+            afk_enabled='Enabled' if afk_enabled else 'Disabled',
+            afk_message=afk_message,
+            afk_delay=afk_delay,
+            afk_typing='Enabled' if afk_typing else 'Disabled',
+            afk_typing_length=afk_typing_length,
+            afk_reply='Enabled' if afk_reply else 'Disabled',
+            afk_server='Enabled' if afk_server else 'Disabled',
+            afk_cooldown=afk_cooldown
+        )
         
         try:
             await forwardEmbedMethod(
@@ -30,22 +30,59 @@ def script_function():
             return False
     
     def extract_user_id(args):
-        """Extract user ID from mention or direct ID input."""
-        if not args:
+        """Extract user ID (as an int) from mention or direct ID input."""
+        s = args.strip() if args else ""
+        if not s:
             return None
         
         # Check for mention format <@123456789> or <@!123456789>
-        mention_match = re.match(r'<@!?(\d+)>', args.strip())
-        if mention_match:
-            return mention_match.group(1)
+        if s.startswith("<@"):
+            start = 3 if s[2:3] == "!" else 2
+            end = s.find(">", start)
+            if end > start and s[start:end].isdecimal():
+                return int(s[start:end])
         
         # Check if it's a direct ID (all digits)
-        direct_id = args.strip().split()[0]
-        if direct_id.isdigit():
-            return direct_id
+        direct_id = s.split(None, 1)[0]
+        if direct_id.isdecimal():
+            return int(direct_id)
         
         return None
     
+    async def resolve_user(user_id):
+        """Get a user from the client cache, fetching from the API only on a miss."""
+        return bot.get_user(user_id) or await bot.fetch_user(user_id)
+    
+    # Blocked user IDs, primed from relationships on first use and kept
+    # current by relationship events afterwards
+    blocked_ids = set()
+    blocked_state = {"primed": False}
+    
+    async def get_blocked_ids():
+        """Return the cached set of blocked user IDs."""
+        if not blocked_state["primed"]:
+            async for relationship in bot.user.relationships:
+                if relationship.type.name == "blocked":
+                    blocked_ids.add(relationship.user.id)
+            blocked_state["primed"] = True
+        return blocked_ids
+    
+    @bot.listen("on_relationship_add")
+    async def track_relationship_add(relationship):
+        if relationship.type.name == "blocked":
+            blocked_ids.add(relationship.user.id)
+    
+    @bot.listen("on_relationship_update")
+    async def track_relationship_update(before, after):
+        if after.type.name == "blocked":
+            blocked_ids.add(after.user.id)
+        else:
+            blocked_ids.discard(after.user.id)
+    
+    @bot.listen("on_relationship_remove")
+    async def track_relationship_remove(relationship):
+        blocked_ids.discard(relationship.user.id)
+    
     @bot.command(
         name="block",
         aliases=["b"],
@@ -66,19 +103,19 @@ def script_function():
         
         # Check if already blocked to prevent errors
         try:
-            async for relationship in bot.user.relationships:
-                if str(relationship.user.id) == user_id and relationship.type.name == "blocked":
-                    await ctx.send(f"> User `{user_id}` is already blocked.", delete_after=5)
-                    return
+            if user_id in await get_blocked_ids():
+                await ctx.send(f"> User `{user_id}` is already blocked.", delete_after=5)
+                return
         except Exception as e:
             print(f"Error checking block status: {e}", type_="ERROR")
         
         try:
-            # Attempt to fetch the user
-            user = await bot.fetch_user(int(user_id))
+            # Look up the user (cache first, then API)
+            user = await resolve_user(user_id)
             
             # Block the user via Discord API
             await user.block()
+            blocked_ids.add(user_id)
             
             await ctx.send(f"> Successfully blocked **{user.name}** (`{user_id}`)", delete_after=5)
             print(f"Blocked user: {user.name} ({user_id})", type_="SUCCESS")
@@ -108,11 +145,12 @@ def script_function():
             return
         
         try:
-            # Attempt to fetch the user
-            user = await bot.fetch_user(int(user_id))
+            # Look up the user (cache first, then API)
+            user = await resolve_user(user_id)
             
             # Unblock the user via Discord API
             await user.unblock()
+            blocked_ids.discard(user_id)
             
             await ctx.send(f"> Successfully unblocked **{user.name}** (`{user_id}`)", delete_after=5)
             print(f"Unblocked user: {user.name} ({user_id})", type_="SUCCESS")
@@ -144,15 +182,15 @@ def script_function():
         # Check if already ignored to prevent errors
         try:
             async for relationship in bot.user.relationships:
-                if str(relationship.user.id) == user_id and relationship.type.name == "implicit":
+                if relationship.user.id == user_id and relationship.type.name == "implicit":
                     await ctx.send(f"> User `{user_id}` is already ignored.", delete_after=5)
                     return
         except Exception as e:
             print(f"Error checking ignore status: {e}", type_="ERROR")
         
         try:
-            # Attempt to fetch the user
-            user = await bot.fetch_user(int(user_id))
+            # Look up the user (cache first, then API)
+            user = await resolve_user(user_id)
             
             # Ignore the user via Discord API (suppress messages)
             await user.ignore()
@@ -187,8 +225,8 @@ def script_function():
             return
         
         try:
-            # Attempt to fetch the user
-            user = await bot.fetch_user(int(user_id))
+            # Look up the user (cache first, then API)
+            user = await resolve_user(user_id)
             
             # Unignore the user via Discord API
             await user.unignore()
@@ -215,10 +253,18 @@ def script_function():
         try:
             # Fetch blocked users from Discord
             blocked_users = []
+            fresh_ids = set()
             async for relationship in bot.user.relationships:
                 if relationship.type.name == "blocked":
+                    fresh_ids.add(relationship.user.id)
                     blocked_users.append(f"> • **{relationship.user.name}** (`{relationship.user.id}`)")
             
+            # Swap the cache only after a full pass, so a failed fetch or a
+            # block command running meanwhile never sees it half-filled
+            blocked_ids.clear()
+            blocked_ids.update(fresh_ids)
+            blocked_state["primed"] = True
+            
             if not blocked_users:
                 await ctx.send("> Your block list is empty.", delete_after=5)
                 return
@@ -256,17 +302,7 @@ def script_function():
             await ctx.send(f"> Failed to retrieve ignore list: {str(e)}", delete_after=5)
             print(f"Error retrieving ignore list: {e}", type_="ERROR")
     
-    @bot.command(
-        name="blockhelp",
-        aliases=["bhelp", "bh"],
-        description="Display help information for Block & Ignore Manager"
-    )
-    async def block_help(ctx):
-        await ctx.message.delete()
-        
-        prefix = getConfigData().get('prefix', '.')
-        
-        help_text = f"""
+    HELP_TEMPLATE = """
 
 > **BLOCK COMMANDS:**
 > `{prefix}block <@user or user_id>` - Block a user using Discord API
@@ -282,8 +318,25 @@ def script_function():
 > Block: `{prefix}b` | Unblock: `{prefix}ub`
 > Ignore: `{prefix}ig` | Unignore: `{prefix}uig`
 > Blocklist: `{prefix}bl` | Ignorelist: `{prefix}il`"""
+    
+    # Formatted help text, rebuilt only when the command prefix changes
+    help_cache = {"prefix": None, "text": ""}
+    
+    @bot.command(
+        name="blockhelp",
+        aliases=["bhelp", "bh"],
+        description="Display help information for Block & Ignore Manager"
+    )
+    async def block_help(ctx):
+        await ctx.message.delete()
+        
+        prefix = getConfigData().get('prefix', '.')
+        
+        if help_cache["prefix"] != prefix:
+            help_cache["prefix"] = prefix
+            help_cache["text"] = HELP_TEMPLATE.format(prefix=prefix)
         
-        await ctx.send(help_text, delete_after=30)
+        await ctx.send(help_cache["text"], delete_after=30)
     
     
     print("Block & Ignore Manager script loaded successfully.", type_="SUCCESS")
@@ -1,7 +1,16 @@
-from datetime import datetime
-import requests
+from datetime import datetime, timezone
+import aiohttp
 import json
 import asyncio
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Edit this with your Discord webhook URL
+WEBHOOK_URL = "https://discord.com/api/webhooks/YOUR_WEBHOOK_ID/YOUR_WEBHOOK_TOKEN"
 
 def script_function():
     
@@ -14,25 +23,39 @@ def script_function():
         """Returns True if webhook URL is configured"""
         return WEBHOOK_URL != "https://discord.com/api/webhooks/YOUR_WEBHOOK_ID/YOUR_WEBHOOK_TOKEN"
 
-    # Helper function to check if logging is enabled
-    def is_logging_enabled():
-        """Returns True if logging is enabled"""
-        enabled = getConfigData().get("dmlogger_enabled", False)
-        return enabled and is_webhook_configured()
+    # Whether the listeners should log, cached so they don't read the config
+    # on every message; kept in sync by the dmlog command
+    webhook_configured = is_webhook_configured()
+    logging_enabled = webhook_configured and getConfigData().get("dmlogger_enabled", False)
+
+    # Shared HTTP session so webhook posts reuse the keep-alive connection;
+    # created on first use so it binds to the running event loop. It lives
+    # until the process exits, since scripts get no unload hook; idle sockets
+    # are dropped after keepalive_timeout in the meantime
+    http_state = {"session": None}
 
-    # Asynchronous helper for running sync functions
-    async def run_in_thread(func, *args, **kwargs):
-        """Runs a synchronous function in a separate thread."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+    async def get_http_session():
+        """Returns the shared aiohttp session, creating it if needed"""
+        if http_state["session"] is None or http_state["session"].closed:
+            http_state["session"] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, ttl_dns_cache=300, keepalive_timeout=75),
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return http_state["session"]
+
+    # Retry policy for rate limits and transient server/network errors
+    WEBHOOK_RETRY_STATUSES = (429, 500, 502, 503, 504)
+    WEBHOOK_MAX_RETRIES = 3
+    WEBHOOK_RETRY_BACKOFF = 0.5
 
     # Webhook sending function
-    def send_webhook_embed(embed_data: dict) -> bool:
+    async def send_webhook_embeds(embeds: list) -> bool:
         """
-        Sends an embed to the Discord webhook.
+        Sends one or more embeds to the Discord webhook in a single message.
         
         Args:
-            embed_data: A dictionary representing the embed structure.
+            embeds: A list of dictionaries representing embed structures.
         
         Returns:
             True if the message was sent successfully, False otherwise.
@@ -41,30 +64,113 @@ def script_function():
             print("Webhook URL is not configured.", type_="ERROR")
             return False
         
-        payload = {"embeds": [embed_data]}
-        headers = {"Content-Type": "application/json"}
+        payload = {"embeds": embeds}
+        data = orjson.dumps(payload) if orjson else json.dumps(payload)
         
-        try:
-            response = requests.post(WEBHOOK_URL, headers=headers, data=json.dumps(payload), timeout=10)
-            response.raise_for_status()
+        for attempt in range(WEBHOOK_MAX_RETRIES + 1):
+            retry_after = None
+            try:
+                session = await get_http_session()
+                async with session.post(WEBHOOK_URL, data=data) as response:
+                    if response.status == 204:
+                        return True
+                    if response.status not in WEBHOOK_RETRY_STATUSES or attempt == WEBHOOK_MAX_RETRIES:
+                        print(f"Webhook returned unexpected status: {response.status}", type_="ERROR")
+                        return False
+                    retry_after = response.headers.get("Retry-After")
+                    
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == WEBHOOK_MAX_RETRIES:
+                    print(f"Error sending webhook message: {e}", type_="ERROR")
+                    return False
+            except Exception as e:
+                print(f"Unexpected error during webhook sending: {e}", type_="ERROR")
+                return False
             
-            if response.status_code == 204:
-                return True
+            # Honour Discord's Retry-After on 429, otherwise back off exponentially
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = WEBHOOK_RETRY_BACKOFF * (2 ** attempt)
+            await asyncio.sleep(delay)
+        
+        return False
+
+    # Listeners enqueue embeds here and a single sender task posts them, so a
+    # slow or rate-limited webhook never holds up event handling
+    webhook_queue = asyncio.Queue(maxsize=256)
+
+    # Discord allows at most 10 embeds and 6000 embed characters per message
+    MAX_BATCH_EMBEDS = 10
+    MAX_BATCH_CHARS = 6000
+
+    def embed_size(embed_data: dict) -> int:
+        """Returns the character count Discord applies to an embed's text"""
+        return (
+            len(embed_data.get("title", ""))
+            + len(embed_data.get("description", ""))
+            + len(embed_data.get("footer", {}).get("text", ""))
+        )
+
+    async def webhook_sender():
+        """Drains the webhook queue, coalescing queued embeds into one request"""
+        held = None
+        while True:
+            if held is not None:
+                batch = [held]
+                held = None
             else:
-                print(f"Webhook returned unexpected status: {response.status_code}", type_="ERROR")
-                return False
-                
-        except requests.exceptions.RequestException as e:
-            print(f"Error sending webhook message: {e}", type_="ERROR")
-            return False
-        except Exception as e:
-            print(f"Unexpected error during webhook sending: {e}", type_="ERROR")
-            return False
+                batch = [await webhook_queue.get()]
+            batch_size = embed_size(batch[0][0])
+            
+            # Pull whatever else is already waiting, up to Discord's limits
+            while len(batch) < MAX_BATCH_EMBEDS:
+                try:
+                    item = webhook_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                item_size = embed_size(item[0])
+                if batch_size + item_size > MAX_BATCH_CHARS:
+                    held = item
+                    break
+                batch.append(item)
+                batch_size += item_size
+            
+            try:
+                if await send_webhook_embeds([embed_data for embed_data, _ in batch]):
+                    for _, log_message in batch:
+                        print(log_message, type_="INFO")
+            finally:
+                for _ in batch:
+                    webhook_queue.task_done()
+
+    def queue_webhook_embed(embed_data: dict, log_message: str):
+        """Queues an embed for the sender task, dropping it if the queue is full"""
+        try:
+            webhook_queue.put_nowait((embed_data, log_message))
+        except asyncio.QueueFull:
+            print("Webhook queue is full, dropping DM log entry", type_="ERROR")
 
-    # Helper function to format timestamp
-    def format_timestamp():
-        """Returns current timestamp formatted"""
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    bot.loop.create_task(webhook_sender())
+
+    # Formatted timestamps for the current second, reused across a burst of events
+    timestamp_cache = {"second": None, "display": "", "iso": ""}
+
+    # Helper function to format timestamps
+    def get_timestamps():
+        """Returns the current time as (display string, UTC ISO string)"""
+        second = int(time.time())
+        if second != timestamp_cache["second"]:
+            now = datetime.fromtimestamp(second)
+            timestamp_cache["second"] = second
+            timestamp_cache["display"] = now.strftime("%Y-%m-%d %H:%M:%S")
+            timestamp_cache["iso"] = now.astimezone(timezone.utc).isoformat()
+        return timestamp_cache["display"], timestamp_cache["iso"]
+
+    # Static parts of each embed; listeners copy these and add the per-event fields
+    NEW_DM_EMBED = {"title": "📨 New DM Received", "color": 0x5865F2, "footer": {"text": "DM Logger"}}
+    EDITED_DM_EMBED = {"title": "✏️ DM Edited", "color": 0xFFA500, "footer": {"text": "DM Logger"}}
+    DELETED_DM_EMBED = {"title": "🗑️ DM Deleted", "color": 0xFF0000, "footer": {"text": "DM Logger"}}
 
     # Helper function to truncate long messages
     def truncate_message(content, max_length=1800):
@@ -76,151 +182,99 @@ def script_function():
     # Event listener for new DM messages
     @bot.listen("on_message")
     async def dm_message_logger(message):
-        # Ignore messages from self
-        if message.author.id == bot.user.id:
+        # Only process DMs from others while logging is enabled (cheapest check first)
+        if message.guild or not logging_enabled or message.author.id == bot.user.id:
             return
         
-        # Only process DMs (messages without a guild)
-        if message.guild:
-            return
+        # Prepare message content
+        msg_content = truncate_message(message.content) if message.content else "*No text content*"
         
-        # Check if logging is enabled
-        if not is_logging_enabled():
-            return
+        # Add attachment info if present
+        if message.attachments:
+            attachment_lines = [f"- [{att.filename}]({att.url})\n" for att in message.attachments]
+            msg_content += "\n\n**Attachments:**\n" + "".join(attachment_lines)
         
-        try:
-            # Prepare message content
-            msg_content = truncate_message(message.content) if message.content else "*No text content*"
-            
-            # Add attachment info if present
-            if message.attachments:
-                attachment_info = "\n\n**Attachments:**\n"
-                for att in message.attachments:
-                    attachment_info += f"- [{att.filename}]({att.url})\n"
-                msg_content += attachment_info
-            
-            # Create embed data
-            embed_data = {
-                "title": "📨 New DM Received",
-                "description": (
-                    f"# DM Logger - Sent\n\n"
-                    f"**DM logger | {message.author} sent a message**\n\n"
-                    f"**Message:**\n> {msg_content}\n\n"
-                    f"**Jump:** [Click here]({message.jump_url})\n\n"
-                    f"**Timestamp:** {format_timestamp()}"
-                ),
-                "color": 0x5865F2,
-                "footer": {"text": "DM Logger"},
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            # Send via webhook
-            success = await run_in_thread(send_webhook_embed, embed_data)
-            
-            if success:
-                print(f"Logged new DM from {message.author}", type_="INFO")
-                
-        except Exception as e:
-            print(f"Error logging DM message: {e}", type_="ERROR")
+        # Create embed data
+        ts_display, ts_iso = get_timestamps()
+        embed_data = dict(
+            NEW_DM_EMBED,
+            description=(
+                f"# DM Logger - Sent\n\n"
+                f"**DM logger | {message.author} sent a message**\n\n"
+                f"**Message:**\n> {msg_content}\n\n"
+                f"**Jump:** [Click here]({message.jump_url})\n\n"
+                f"**Timestamp:** {ts_display}"
+            ),
+            timestamp=ts_iso
+        )
+        
+        # Hand off to the webhook sender
+        queue_webhook_embed(embed_data, f"Logged new DM from {message.author}")
 
     # Event listener for edited DM messages
     @bot.listen("on_message_edit")
     async def dm_edit_logger(before, after):
-        # Ignore self edits
-        if after.author.id == bot.user.id:
-            return
-        
-        # Only process DMs
-        if after.guild:
+        # Only process DM edits from others while logging is enabled (cheapest check first)
+        if after.guild or not logging_enabled or after.author.id == bot.user.id:
             return
         
         # Ignore if content didn't change
         if before.content == after.content:
             return
         
-        # Check if logging is enabled
-        if not is_logging_enabled():
-            return
+        # Prepare message contents
+        before_content = truncate_message(before.content) if before.content else "*No text content*"
+        after_content = truncate_message(after.content) if after.content else "*No text content*"
         
-        try:
-            # Prepare message contents
-            before_content = truncate_message(before.content) if before.content else "*No text content*"
-            after_content = truncate_message(after.content) if after.content else "*No text content*"
-            
-            # Create embed data
-            embed_data = {
-                "title": "✏️ DM Edited",
-                "description": (
-                    f"# DM Logger - Edit\n\n"
-                    f"**DM logger | {after.author} edited a message**\n\n"
-                    f"**Before:**\n> {before_content}\n\n"
-                    f"**After:**\n> {after_content}\n\n"
-                    f"**Jump:** [Click here]({after.jump_url})\n\n"
-                    f"**Timestamp:** {format_timestamp()}"
-                ),
-                "color": 0xFFA500,
-                "footer": {"text": "DM Logger"},
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            # Send via webhook
-            success = await run_in_thread(send_webhook_embed, embed_data)
-            
-            if success:
-                print(f"Logged DM edit from {after.author}", type_="INFO")
-                
-        except Exception as e:
-            print(f"Error logging DM edit: {e}", type_="ERROR")
+        # Create embed data
+        ts_display, ts_iso = get_timestamps()
+        embed_data = dict(
+            EDITED_DM_EMBED,
+            description=(
+                f"# DM Logger - Edit\n\n"
+                f"**DM logger | {after.author} edited a message**\n\n"
+                f"**Before:**\n> {before_content}\n\n"
+                f"**After:**\n> {after_content}\n\n"
+                f"**Jump:** [Click here]({after.jump_url})\n\n"
+                f"**Timestamp:** {ts_display}"
+            ),
+            timestamp=ts_iso
+        )
+        
+        # Hand off to the webhook sender
+        queue_webhook_embed(embed_data, f"Logged DM edit from {after.author}")
 
     # Event listener for deleted DM messages
     @bot.listen("on_message_delete")
     async def dm_delete_logger(message):
-        # Ignore self deletions
-        if message.author.id == bot.user.id:
+        # Only process DM deletions by others while logging is enabled (cheapest check first)
+        if message.guild or not logging_enabled or message.author.id == bot.user.id:
             return
         
-        # Only process DMs
-        if message.guild:
-            return
+        # Prepare message content
+        msg_content = truncate_message(message.content) if message.content else "*No text content*"
         
-        # Check if logging is enabled
-        if not is_logging_enabled():
-            return
+        # Add attachment info if present
+        if message.attachments:
+            attachment_lines = [f"- {att.filename}\n" for att in message.attachments]
+            msg_content += "\n\n**Attachments (deleted):**\n" + "".join(attachment_lines)
         
-        try:
-            # Prepare message content
-            msg_content = truncate_message(message.content) if message.content else "*No text content*"
-            
-            # Add attachment info if present
-            if message.attachments:
-                attachment_info = "\n\n**Attachments (deleted):**\n"
-                for att in message.attachments:
-                    attachment_info += f"- {att.filename}\n"
-                msg_content += attachment_info
-            
-            # Create embed data
-            embed_data = {
-                "title": "🗑️ DM Deleted",
-                "description": (
-                    f"# DM Logger - Deleted\n\n"
-                    f"**DM logger | {message.author} deleted a message**\n\n"
-                    f"**Message:**\n> {msg_content}\n\n"
-                    f"**Jump:** [Original location]({message.jump_url})\n\n"
-                    f"**Timestamp:** {format_timestamp()}"
-                ),
-                "color": 0xFF0000,
-                "footer": {"text": "DM Logger"},
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-            # Send via webhook
-            success = await run_in_thread(send_webhook_embed, embed_data)
-            
-            if success:
-                print(f"Logged DM deletion from {message.author}", type_="INFO")
-                
-        except Exception as e:
-            print(f"Error logging DM deletion: {e}", type_="ERROR")
+        # Create embed data
+        ts_display, ts_iso = get_timestamps()
+        embed_data = dict(
+            DELETED_DM_EMBED,
+            description=(
+                f"# DM Logger - Deleted\n\n"
+                f"**DM logger | {message.author} deleted a message**\n\n"
+                f"**Message:**\n> {msg_content}\n\n"
+                f"**Jump:** [Original location]({message.jump_url})\n\n"
+                f"**Timestamp:** {ts_display}"
+            ),
+            timestamp=ts_iso
+        )
+        
+        # Hand off to the webhook sender
+        queue_webhook_embed(embed_data, f"Logged DM deletion from {message.author}")
 
     # Command to configure DM logger
     @bot.command(
@@ -230,6 +284,7 @@ def script_function():
         description="Configure DM logging settings"
     )
     async def dmlog_command(ctx, *, args: str = ""):
+        nonlocal logging_enabled
         await ctx.message.delete()
         
         # Parse arguments
@@ -260,6 +315,7 @@ def script_function():
                 return
             
             updateConfigData("dmlogger_enabled", True)
+            logging_enabled = True
             await ctx.send("✅ DM logging enabled.", delete_after=5)
             print("DM logging enabled", type_="SUCCESS")
             return
@@ -267,6 +323,7 @@ def script_function():
         # Off command
         if args == "off":
             updateConfigData("dmlogger_enabled", False)
+            logging_enabled = False
             await ctx.send("✅ DM logging disabled.", delete_after=5)
             print("DM logging disabled", type_="INFO")
             return
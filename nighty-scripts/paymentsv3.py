@@ -1,9 +1,13 @@
 def paymentSettings():
-    import os, json, re
+    import os, json, re, threading, functools
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
 
     # Dateipfad
-    os.makedirs(f'{getScriptsPath()}/scriptData', exist_ok=True)
-    script_config_path = f"{getScriptsPath()}/scriptData/payments.json"
+    script_data_dir = os.path.join(getScriptsPath(), "scriptData")
+    script_config_path = os.path.join(script_data_dir, "payments.json")
 
     # Standardfelder inkl. Solana und Ethereum
     default_settings = {
@@ -15,57 +19,106 @@ def paymentSettings():
         "venmo": ""
     }
 
+    # Kompakt und atomar speichern (Temp-Datei + os.replace)
+    def saveSettings(data):
+        tmp_path = script_config_path + ".tmp"
+        if orjson:
+            raw = orjson.dumps(data)
+        else:
+            raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        with open(tmp_path, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp_path, script_config_path)
+
     # Robust: payments.json automatisch reparieren!
     def loadSettings():
-        if os.path.exists(script_config_path):
-            try:
-                with open(script_config_path, 'r', encoding="utf-8") as f:
-                    data = json.load(f)
-                # Defaultfelder ergänzen/abschneiden
-                for key in default_settings:
-                    if key not in data:
-                        data[key] = ""
-                data = {k: data.get(k, "") for k in default_settings}
-                with open(script_config_path, 'w', encoding="utf-8") as f:
-                    json.dump(data, f, indent=2)
-                return data
-            except Exception:
-                with open(script_config_path, 'w', encoding="utf-8") as f:
-                    json.dump(default_settings, f, indent=2)
-                return default_settings
-        else:
-            with open(script_config_path, 'w', encoding="utf-8") as f:
-                json.dump(default_settings, f, indent=2)
-            return default_settings
+        try:
+            with open(script_config_path, 'rb') as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson else json.loads(raw)
+            # Defaultfelder ergänzen/abschneiden, nur bei Änderung speichern
+            normalized = {k: data.get(k, "") for k in default_settings}
+            if normalized != data:
+                saveSettings(normalized)
+            return normalized
+        except Exception:
+            # Datei fehlt oder ist kaputt (Ordner nur dann anlegen)
+            os.makedirs(script_data_dir, exist_ok=True)
+            saveSettings(default_settings)
+            return dict(default_settings)
+
+    # Einmal laden, danach nur noch aus dem Speicher lesen
+    settings = loadSettings()
+
+    # Eingaben sammeln und erst nach kurzer Tipp-Pause speichern
+    SAVE_DELAY = 0.4
+    save_timer = None
+
+    # Läuft im Timer-Thread: Fehler dort würden sonst stumm verschwinden
+    def flushSettings():
+        try:
+            saveSettings(dict(settings))
+        except Exception as e:
+            print(f"Fehler beim Speichern von payments.json: {e}", type_="ERROR")
 
     def updateSetting(key, value):
-        settings = loadSettings()
+        nonlocal save_timer
         settings[key] = value
-        with open(script_config_path, 'w', encoding="utf-8") as f:
-            json.dump(settings, f, indent=2)
+        if save_timer is not None:
+            save_timer.cancel()
+        # Kein Daemon-Thread: beim Beenden wartet Python auf den letzten Save
+        save_timer = threading.Timer(SAVE_DELAY, flushSettings)
+        save_timer.start()
 
     def getSetting(key=None):
-        settings = loadSettings()
         return settings.get(key) if key else settings
 
-    # Validierung
+    # Validierung (Regex erst beim ersten Aufruf kompiliert, mit \Z verankert für .match)
+    @functools.lru_cache(maxsize=None)
+    def getLitecoinRe():
+        return re.compile(r"[LM][a-km-zA-HJ-NP-Z1-9]{25,34}\Z")
+
+    @functools.lru_cache(maxsize=None)
+    def getSolanaRe():
+        return re.compile(r"[1-9A-HJ-NP-Za-km-z]{32,44}\Z")
+
+    # Einfache Formate ohne Regex prüfen
+    HEX_CHARS = frozenset("0123456789abcdefABCDEF")
+    VENMO_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+
     def isValidCashtag(cashtag):
-        return bool(re.fullmatch(r"\$[a-zA-Z0-9]{1,15}", cashtag)) or not cashtag
+        if not cashtag:
+            return True
+        tag = cashtag[1:]
+        return len(cashtag) <= 16 and cashtag[0] == "$" and tag.isascii() and tag.isalnum()
 
     def isValidCryptoAddress(address):
-        return bool(re.fullmatch(r"[LM][a-km-zA-HJ-NP-Z1-9]{25,34}", address)) or not address
+        if not address:
+            return True
+        # Präfix und Länge zuerst, Regex nur wenn das passt
+        return address[0] in "LM" and 26 <= len(address) <= 35 and bool(getLitecoinRe().match(address))
 
     def isValidPaypal(email):
-        return bool(re.fullmatch(r"[^@]+@[^@]+\.[^@]+", email)) or not email
+        if not email:
+            return True
+        # user@domain.tld: genau ein @, Punkt innerhalb der Domain
+        local, at, domain = email.partition("@")
+        return bool(local) and at == "@" and "@" not in domain and "." in domain[1:-1]
 
     def isValidVenmo(venmo):
-        return bool(re.fullmatch(r"@[a-zA-Z0-9_]+", venmo)) or not venmo
+        if not venmo:
+            return True
+        return len(venmo) > 1 and venmo[0] == "@" and VENMO_CHARS.issuperset(venmo[1:])
 
     def isValidSolana(address):
-        return bool(re.fullmatch(r"[1-9A-HJ-NP-Za-km-z]{32,44}", address)) or not address
+        if not address:
+            return True
+        return 32 <= len(address) <= 44 and bool(getSolanaRe().match(address))
 
     def isValidEthereum(address):
-        return bool(re.fullmatch(r"0x[a-fA-F0-9]{40}", address)) or not address
+        if not address:
+            return True
+        return len(address) == 42 and address.startswith("0x") and HEX_CHARS.issuperset(address[2:])
 
     # Universelle Input-Prüfung
     def validateInput(new_value, current_input, validate_func, key, error_message):
@@ -78,23 +131,25 @@ def paymentSettings():
         updateSetting(key, new_value)
         return True
 
-    def checkPaypalInput(new_value):
-        return validateInput(new_value, paypal_input, isValidPaypal, "paypal", "Ungültiges PayPal Format.")
-
-    def checkCashtagInput(new_value):
-        return validateInput(new_value, cashtag_input, isValidCashtag, "cashapp", "Ungültiger CashApp Tag. Muss mit $ und 1-15 Alphanumerisch sein.")
+    # Eingabefelder: Schlüssel -> (Validator, Fehlermeldung)
+    FIELD_CHECKS = {
+        "paypal": (isValidPaypal, "Ungültiges PayPal Format."),
+        "cashapp": (isValidCashtag, "Ungültiger CashApp Tag. Muss mit $ und 1-15 Alphanumerisch sein."),
+        "litecoin": (isValidCryptoAddress, "Ungültige Litecoin Adresse."),
+        "venmo": (isValidVenmo, "Ungültiges Venmo Handle, muss mit @ beginnen."),
+        "solana": (isValidSolana, "Ungültige Solana-Adresse."),
+        "ethereum": (isValidEthereum, "Ungültige Ethereum-Adresse.")
+    }
 
-    def checkLtcInput(new_value):
-        return validateInput(new_value, ltc_input, isValidCryptoAddress, "litecoin", "Ungültige Litecoin Adresse.")
+    inputs = {}
 
-    def checkVenmoInput(new_value):
-        return validateInput(new_value, venmo_input, isValidVenmo, "venmo", "Ungültiges Venmo Handle, muss mit @ beginnen.")
+    def makeInputCheck(key):
+        validate_func, error_message = FIELD_CHECKS[key]
 
-    def checkSolanaInput(new_value):
-        return validateInput(new_value, solana_input, isValidSolana, "solana", "Ungültige Solana-Adresse.")
+        def checkInput(new_value):
+            return validateInput(new_value, inputs[key], validate_func, key, error_message)
 
-    def checkEthereumInput(new_value):
-        return validateInput(new_value, ethereum_input, isValidEthereum, "ethereum", "Ungültige Ethereum-Adresse.")
+        return checkInput
 
     # Nighty UI Tab
     payment_tab = Tab(name="Payment Settings", title="Payment Settings", icon="calc")
@@ -106,88 +161,91 @@ def paymentSettings():
 
     payment_group = payment_card.create_group(type="columns", gap=3, full_width=True)
 
-    # Inputs
-    paypal_input = payment_group.create_ui_element(
+    # Inputs (Einstellungen einmal für alle Platzhalter lesen)
+    saved = getSetting()
+    inputs["paypal"] = payment_group.create_ui_element(
         UI.Input,
         label="PayPal Email (leave blank to exclude)",
-        placeholder=getSetting("paypal") or "PAYPAL EMAIL HERE",
+        placeholder=saved["paypal"] or "PAYPAL EMAIL HERE",
         show_clear_button=True,
-        onInput=checkPaypalInput,
+        onInput=makeInputCheck("paypal"),
         full_width=True
     )
 
-    cashtag_input = payment_group.create_ui_element(
+    inputs["cashapp"] = payment_group.create_ui_element(
         UI.Input,
         label="CashApp Tag (leave blank to exclude)",
-        placeholder=getSetting("cashapp") or "CASHTAG HERE",
+        placeholder=saved["cashapp"] or "CASHTAG HERE",
         show_clear_button=True,
-        onInput=checkCashtagInput,
+        onInput=makeInputCheck("cashapp"),
         full_width=True
     )
 
-    ltc_input = payment_card.create_ui_element(
+    inputs["litecoin"] = payment_card.create_ui_element(
         UI.Input,
         label="Litecoin Address (leave blank to exclude)",
-        placeholder=getSetting("litecoin") or "LTC ADDY HERE",
+        placeholder=saved["litecoin"] or "LTC ADDY HERE",
         show_clear_button=True,
-        onInput=checkLtcInput,
+        onInput=makeInputCheck("litecoin"),
         full_width=True
     )
 
-    solana_input = payment_card.create_ui_element(
+    inputs["solana"] = payment_card.create_ui_element(
         UI.Input,
         label="Solana Address (leave blank to exclude)",
-        placeholder=getSetting("solana") or "SOLANA WALLET HERE",
+        placeholder=saved["solana"] or "SOLANA WALLET HERE",
         show_clear_button=True,
-        onInput=checkSolanaInput,
+        onInput=makeInputCheck("solana"),
         full_width=True
     )
 
-    ethereum_input = payment_card.create_ui_element(
+    inputs["ethereum"] = payment_card.create_ui_element(
         UI.Input,
         label="Ethereum Address (leave blank to exclude)",
-        placeholder=getSetting("ethereum") or "ETH WALLET HERE",
+        placeholder=saved["ethereum"] or "ETH WALLET HERE",
         show_clear_button=True,
-        onInput=checkEthereumInput,
+        onInput=makeInputCheck("ethereum"),
         full_width=True
     )
 
-    venmo_input = payment_group.create_ui_element(
+    inputs["venmo"] = payment_group.create_ui_element(
         UI.Input,
         label="Venmo Handle (leave blank to exclude)",
-        placeholder=getSetting("venmo") or "@VENMO HANDLE HERE",
+        placeholder=saved["venmo"] or "@VENMO HANDLE HERE",
         show_clear_button=True,
-        onInput=checkVenmoInput,
+        onInput=makeInputCheck("venmo"),
         full_width=True
     )
 
+    # Fester Nachrichtenkopf, die Zahlungsarten werden angehängt
+    PAYMENT_INSTRUCTIONS = (
+        "**💳 Payment Instructions 💳**\n\n"
+        "1️⃣ Ensure the transaction is completed successfully.\n"
+        "2️⃣ Provide a screenshot of the transaction details as proof of payment.\n"
+        "3️⃣ Make sure the screenshot is **clear** and **uncropped**.\n\n"
+        "**⚠️ Rules for Payment ⚠️**\n"
+        "- Payments must be sent as **Friends & Family (F&F)**.\n"
+        "- Double-check the address before sending funds.\n"
+        "- **All payments are non-refundable** in case of errors or incorrect transactions.\n"
+        "- Do **NOT** include any notes or memos with the transaction.\n\n"
+        "### Accepted Payment Methods ###"
+    )
+
     @bot.command(name="payment", aliases=["payments", "pay", "p"])
     async def payment(ctx):
         await ctx.message.delete()
+        current = getSetting()
         payments = {
-            "PayPal": getSetting("paypal"),
-            "CashApp": getSetting("cashapp"),
-            "Litecoin": getSetting("litecoin"),
-            "Solana": getSetting("solana"),
-            "Ethereum": getSetting("ethereum"),
-            "Venmo": getSetting("venmo"),
+            "PayPal": current.get("paypal"),
+            "CashApp": current.get("cashapp"),
+            "Litecoin": current.get("litecoin"),
+            "Solana": current.get("solana"),
+            "Ethereum": current.get("ethereum"),
+            "Venmo": current.get("venmo"),
         }
         valid_payments = [f"> {name}: **{value}**" for name, value in payments.items() if value]
         if valid_payments:
-            instructions = (
-                "**💳 Payment Instructions 💳**\n\n"
-                "1️⃣ Ensure the transaction is completed successfully.\n"
-                "2️⃣ Provide a screenshot of the transaction details as proof of payment.\n"
-                "3️⃣ Make sure the screenshot is **clear** and **uncropped**.\n\n"
-                "**⚠️ Rules for Payment ⚠️**\n"
-                "- Payments must be sent as **Friends & Family (F&F)**.\n"
-                "- Double-check the address before sending funds.\n"
-                "- **All payments are non-refundable** in case of errors or incorrect transactions.\n"
-                "- Do **NOT** include any notes or memos with the transaction.\n\n"
-                "### Accepted Payment Methods ###\n"
-                + "\n".join(valid_payments)
-            )
-            await ctx.send(instructions)
+            await ctx.send("\n".join([PAYMENT_INSTRUCTIONS, *valid_payments]))
         else:
             await ctx.send("> No payment methods have been set up.")
 
@@ -1,9 +1,22 @@
 import aiohttp
 import asyncio
 import json
+import os
 import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
+from statistics import fmean
+
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 def speedtest_script():
     """
@@ -42,15 +55,15 @@ def speedtest_script():
     # CONFIGURATION & DATA MANAGEMENT
     # ============================================================================
     
-    # JSON storage setup
+    # JSON storage setup (one result per line, appended after every test)
     BASE_DIR = Path(getScriptsPath()) / "json"
-    HISTORY_FILE = BASE_DIR / "speedtest_history.json"
+    HISTORY_FILE = BASE_DIR / "speedtest_history.jsonl"
+    LEGACY_HISTORY_FILE = BASE_DIR / "speedtest_history.json"
     BASE_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Initialize history file
-    if not HISTORY_FILE.exists():
-        with open(HISTORY_FILE, "w") as f:
-            json.dump([], f, indent=4)
+    # Line count of HISTORY_FILE (counted on first append) and the last
+    # speedtest_history_limit results, kept in memory once first read
+    history_state = {"lines": None, "recent": None}
     
     # Initialize config with defaults
     config_defaults = {
@@ -61,8 +74,9 @@ def speedtest_script():
         "speedtest_history_limit": 20
     }
     
+    cfg = getConfigData()
     for key, default_value in config_defaults.items():
-        if getConfigData().get(key) is None:
+        if cfg.get(key) is None:
             updateConfigData(key, default_value)
     
     # ============================================================================
@@ -84,29 +98,100 @@ def speedtest_script():
         }
     ]
     
+    # Failures a probe or transfer is expected to hit; anything else is a bug
+    NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)
+    
+    # Zero block shared by every upload stream instead of building each body
+    UPLOAD_BLOCK_SIZE = 65536
+    UPLOAD_BLOCK = bytes(UPLOAD_BLOCK_SIZE)
+    
     # ============================================================================
     # HELPER FUNCTIONS
     # ============================================================================
     
-    def load_history():
-        """Load speed test history from JSON file."""
+    def encode_result(result):
+        """Serialize one result as a history line."""
+        if orjson:
+            return orjson.dumps(result) + b"\n"
+        return (json.dumps(result) + "\n").encode()
+    
+    def read_history(limit):
+        """Read the last `limit` speed test results from the history file."""
         try:
-            with open(HISTORY_FILE, "r") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            with open(HISTORY_FILE, "rb") as f:
+                lines = deque(f, maxlen=limit)
+        except FileNotFoundError:
             return []
+        
+        loads = orjson.loads if orjson else json.loads
+        history = []
+        for line in lines:
+            try:
+                history.append(loads(line))
+            except ValueError:
+                continue
+        return history
+    
+    def recent_history():
+        """Return the in-memory deque of the most recent results."""
+        history_limit = getConfigData().get("speedtest_history_limit", 20)
+        recent = history_state["recent"]
+        if recent is None or recent.maxlen != history_limit:
+            recent = deque(read_history(history_limit), maxlen=history_limit)
+            history_state["recent"] = recent
+        return recent
+    
+    def load_history(limit=None):
+        """Load the last `limit` speed test results (all kept ones by default)."""
+        history = list(recent_history())
+        if limit is not None:
+            return history[-limit:]
+        return history
     
     def save_history(history):
-        """Save speed test history to JSON file."""
+        """Rewrite the history file with the given results."""
+        tmp = HISTORY_FILE.with_suffix(".jsonl.tmp")
+        payload = b"".join(encode_result(result) for result in history)
         try:
-            history_limit = getConfigData().get("speedtest_history_limit", 20)
-            limited_history = history[-history_limit:]
-            
-            with open(HISTORY_FILE, "w") as f:
-                json.dump(limited_history, f, indent=4)
+            with open(tmp, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            tmp.replace(HISTORY_FILE)
+            history_state["lines"] = len(history)
         except IOError as e:
             print(f"Error saving speed test history: {e}", type_="ERROR")
     
+    def append_history(result):
+        """Append one result and compact the file once it doubles the limit."""
+        recent = recent_history()
+        
+        if history_state["lines"] is None:
+            try:
+                with open(HISTORY_FILE, "rb") as f:
+                    history_state["lines"] = sum(1 for _ in f)
+            except FileNotFoundError:
+                history_state["lines"] = 0
+        
+        try:
+            with open(HISTORY_FILE, "ab") as f:
+                f.write(encode_result(result))
+            history_state["lines"] += 1
+        except IOError as e:
+            print(f"Error saving speed test history: {e}", type_="ERROR")
+            return
+        
+        recent.append(result)
+        if history_state["lines"] > recent.maxlen * 2:
+            save_history(recent)
+    
+    # Carry over results from the old single-array history file
+    if not HISTORY_FILE.exists() and LEGACY_HISTORY_FILE.exists():
+        try:
+            save_history(json.loads(LEGACY_HISTORY_FILE.read_bytes()))
+        except (IOError, json.JSONDecodeError):
+            pass
+    
     def format_speed(bytes_per_second):
         """Convert bytes/second to Mbps."""
         if bytes_per_second <= 0:
@@ -114,51 +199,63 @@ def speedtest_script():
         mbps = (bytes_per_second * 8) / (1024 * 1024)
         return f"{mbps:.2f} Mbps"
     
+    SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+    
     def format_size(size_bytes):
         """Format bytes into human-readable size."""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} TB"
+        # Each unit spans 10 bits, so the bit length picks it directly
+        index = min(max(size_bytes.bit_length() - 1, 0) // 10, 4)
+        return f"{size_bytes / (1 << (index * 10)):.2f} {SIZE_UNITS[index]}"
     
     # ============================================================================
     # SPEED TEST FUNCTIONS
     # ============================================================================
     
-    async def test_ping(server_url, count=4):
+    async def timed_ping(session, server_url, attempt, count, timeout_config):
+        """Time a single HEAD request in milliseconds, or None on failure."""
+        start_ns = time.perf_counter_ns()
+        try:
+            async with session.head(server_url, allow_redirects=True, timeout=timeout_config):
+                elapsed = (time.perf_counter_ns() - start_ns) / 1e6
+        except NETWORK_ERRORS as e:
+            print(f"Ping attempt {attempt} failed: {e}", type_="ERROR")
+            return None
+        
+        print(f"Ping {attempt}/{count}: {elapsed:.1f}ms", type_="INFO")
+        return elapsed
+    
+    async def test_ping(session, server_url, count=4):
         """Measure ping (latency) to a server."""
-        pings = []
         timeout_config = aiohttp.ClientTimeout(total=5)
         
+        # Untimed warm-up request so the probes below reuse an open keep-alive
+        # connection instead of timing TCP+TLS setup or a wait for a pool slot
         try:
-            async with aiohttp.ClientSession(timeout=timeout_config) as session:
-                for i in range(count):
-                    start = time.time()
-                    try:
-                        async with session.get(server_url, allow_redirects=True) as response:
-                            await response.read()
-                            elapsed = (time.time() - start) * 1000
-                            pings.append(elapsed)
-                            print(f"Ping {i+1}/{count}: {elapsed:.1f}ms", type_="INFO")
-                    except Exception as e:
-                        print(f"Ping attempt {i+1} failed: {e}", type_="ERROR")
-                    
-                    if i < count - 1:
-                        await asyncio.sleep(0.2)
-        except Exception as e:
-            print(f"Ping test error: {e}", type_="ERROR")
-            return None, None
+            async with session.head(server_url, allow_redirects=True, timeout=timeout_config):
+                pass
+        except NETWORK_ERRORS as e:
+            print(f"Ping warm-up failed: {e}", type_="ERROR")
+        
+        # Probes go out back to back on that connection, one at a time, so
+        # jitter is folded in from consecutive samples as they are taken
+        pings = []
+        previous = None
+        jitter_sum = 0.0
+        
+        for i in range(count):
+            elapsed = await timed_ping(session, server_url, i+1, count, timeout_config)
+            if elapsed is None:
+                continue
+            pings.append(elapsed)
+            if previous is not None:
+                jitter_sum += abs(elapsed - previous)
+            previous = elapsed
         
         if not pings:
             return None, None
         
-        avg_ping = sum(pings) / len(pings)
-        
-        if len(pings) > 1:
-            jitter = sum(abs(pings[i] - pings[i-1]) for i in range(1, len(pings))) / (len(pings) - 1)
-        else:
-            jitter = 0
+        avg_ping = fmean(pings)
+        jitter = jitter_sum / (len(pings) - 1) if len(pings) > 1 else 0
         
         return avg_ping, jitter
     
@@ -169,11 +266,7 @@ def speedtest_script():
             print(f"Starting download chunk {chunk_num}...", type_="INFO")
             async with session.get(url, allow_redirects=True) as response:
                 if response.status == 200:
-                    chunk_size = 8192
-                    while bytes_downloaded < max_bytes:
-                        chunk = await response.content.read(chunk_size)
-                        if not chunk:
-                            break
+                    async for chunk in response.content.iter_chunked(262144):
                         bytes_downloaded += len(chunk)
                         if bytes_downloaded >= max_bytes:
                             break
@@ -183,102 +276,108 @@ def speedtest_script():
                     print(f"Chunk {chunk_num} got status {response.status}", type_="ERROR")
         except asyncio.TimeoutError:
             print(f"Chunk {chunk_num} timed out after {format_size(bytes_downloaded)}", type_="ERROR")
-        except Exception as e:
+        except NETWORK_ERRORS as e:
             print(f"Chunk {chunk_num} error: {e}", type_="ERROR")
         
         return bytes_downloaded
     
-    async def test_download(server_url, size_mb, connections):
+    async def test_download(session, server_url, size_mb, connections):
         """Test download speed."""
         total_size = size_mb * 1024 * 1024
         chunk_size = total_size // connections
         
-        timeout_config = aiohttp.ClientTimeout(total=30, sock_read=15)
-        
         try:
             print(f"Testing download with {connections} connections, {size_mb}MB total", type_="INFO")
             
-            async with aiohttp.ClientSession(timeout=timeout_config) as session:
-                start_time = time.time()
-                
-                tasks = [
-                    download_chunk(session, server_url, i+1, chunk_size)
-                    for i in range(connections)
-                ]
-                
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                total_downloaded = sum(r for r in results if isinstance(r, int))
-                elapsed = time.time() - start_time
-                
-                print(f"Downloaded {format_size(total_downloaded)} in {elapsed:.2f}s", type_="INFO")
-                
-                if elapsed > 0 and total_downloaded > 0:
-                    speed = total_downloaded / elapsed
-                    print(f"Download speed: {format_speed(speed)}", type_="SUCCESS")
-                    return speed
-                else:
-                    print("Download test produced no valid results", type_="ERROR")
-                    return 0
+            start_ns = time.perf_counter_ns()
+            
+            tasks = [
+                download_chunk(session, server_url, i+1, chunk_size)
+                for i in range(connections)
+            ]
+            
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            total_downloaded = sum(r for r in results if isinstance(r, int))
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            elapsed = elapsed_ns / 1e9
+            
+            print(f"Downloaded {format_size(total_downloaded)} in {elapsed:.2f}s", type_="INFO")
+            
+            if elapsed_ns > 0 and total_downloaded > 0:
+                speed = total_downloaded * 1_000_000_000 / elapsed_ns
+                print(f"Download speed: {format_speed(speed)}", type_="SUCCESS")
+                return speed
+            else:
+                print("Download test produced no valid results", type_="ERROR")
+                return 0
         except Exception as e:
             print(f"Download test error: {e}", type_="ERROR")
             return 0
     
+    async def upload_payload(data_size):
+        """Yield data_size bytes by reusing the shared zero block."""
+        remaining = data_size
+        while remaining >= UPLOAD_BLOCK_SIZE:
+            yield UPLOAD_BLOCK
+            remaining -= UPLOAD_BLOCK_SIZE
+        if remaining:
+            yield UPLOAD_BLOCK[:remaining]
+    
     async def upload_chunk(session, url, chunk_num, data_size):
         """Upload a chunk of data and return bytes sent."""
         try:
-            data = b'X' * data_size
-            
             print(f"Starting upload chunk {chunk_num}...", type_="INFO")
-            async with session.post(url, data=data) as response:
+            # No Content-Length, so aiohttp frames the generator as chunked
+            async with session.post(url, data=upload_payload(data_size)) as response:
                 await response.read()
                 if response.status < 500:
                     print(f"Chunk {chunk_num} uploaded {format_size(data_size)}", type_="INFO")
                     return data_size
                 else:
                     print(f"Chunk {chunk_num} upload failed with status {response.status}", type_="ERROR")
-        except Exception as e:
+        except NETWORK_ERRORS as e:
             print(f"Upload chunk {chunk_num} error: {e}", type_="ERROR")
         return 0
     
-    async def test_upload(server_url, size_mb, connections):
+    async def test_upload(session, server_url, size_mb, connections):
         """Test upload speed."""
         total_size = size_mb * 1024 * 1024
         chunk_size = total_size // connections
         
-        timeout_config = aiohttp.ClientTimeout(total=30, sock_read=15)
-        
         try:
             print(f"Testing upload with {connections} connections, {size_mb}MB total", type_="INFO")
             
-            async with aiohttp.ClientSession(timeout=timeout_config) as session:
-                start_time = time.time()
-                
-                tasks = [
-                    upload_chunk(session, server_url, i+1, chunk_size)
-                    for i in range(connections)
-                ]
-                
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                total_uploaded = sum(r for r in results if isinstance(r, int))
-                elapsed = time.time() - start_time
-                
-                print(f"Uploaded {format_size(total_uploaded)} in {elapsed:.2f}s", type_="INFO")
-                
-                if elapsed > 0 and total_uploaded > 0:
-                    speed = total_uploaded / elapsed
-                    print(f"Upload speed: {format_speed(speed)}", type_="SUCCESS")
-                    return speed
-                else:
-                    print("Upload test produced no valid results", type_="ERROR")
-                    return 0
+            start_ns = time.perf_counter_ns()
+            
+            tasks = [
+                upload_chunk(session, server_url, i+1, chunk_size)
+                for i in range(connections)
+            ]
+            
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            total_uploaded = sum(r for r in results if isinstance(r, int))
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            elapsed = elapsed_ns / 1e9
+            
+            print(f"Uploaded {format_size(total_uploaded)} in {elapsed:.2f}s", type_="INFO")
+            
+            if elapsed_ns > 0 and total_uploaded > 0:
+                speed = total_uploaded * 1_000_000_000 / elapsed_ns
+                print(f"Upload speed: {format_speed(speed)}", type_="SUCCESS")
+                return speed
+            else:
+                print("Upload test produced no valid results", type_="ERROR")
+                return 0
         except Exception as e:
             print(f"Upload test error: {e}", type_="ERROR")
             return 0
     
     async def run_full_speedtest(quick_mode=False):
         """Run a complete speed test."""
+        now = datetime.now()
         results = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
+            "display_time": now.strftime('%Y-%m-%d %H:%M:%S'),
             "server": TEST_SERVERS[0]["name"],
             "ping": None,
             "jitter": None,
@@ -287,111 +386,113 @@ def speedtest_script():
             "quick_mode": quick_mode
         }
         
-        download_size = getConfigData().get("speedtest_download_size_mb", 10)
-        upload_size = getConfigData().get("speedtest_upload_size_mb", 5)
-        connections = getConfigData().get("speedtest_connections", 3)
+        cfg = getConfigData()
+        download_size = cfg.get("speedtest_download_size_mb", 10)
+        upload_size = cfg.get("speedtest_upload_size_mb", 5)
+        connections = cfg.get("speedtest_connections", 3)
+        timeout = cfg.get("speedtest_timeout", 15)
         
         server = TEST_SERVERS[0]
         
-        print("Testing ping...", type_="INFO")
-        avg_ping, jitter = await test_ping(server["ping_url"])
-        results["ping"] = avg_ping
-        results["jitter"] = jitter
+        # The connector does not own a resolver passed in, so it is closed
+        # below once the session is done
+        resolver = None
+        if aiodns:
+            try:
+                resolver = aiohttp.AsyncResolver()
+            except (RuntimeError, OSError) as e:
+                # Older aiodns cannot run on Windows' ProactorEventLoop; the
+                # connector's default threaded resolver works everywhere
+                print(f"aiodns resolver unavailable, using default DNS: {e}", type_="INFO")
         
-        print("Testing download speed...", type_="INFO")
-        download_speed = await test_download(server["download_url"], download_size, connections)
-        results["download"] = download_speed
+        # One session for every phase so the pool, keep-alive sockets and DNS
+        # cache carry over instead of paying a fresh handshake per phase
+        connector = aiohttp.TCPConnector(
+            resolver=resolver,
+            limit=connections * 2,
+            limit_per_host=connections,
+            force_close=False,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True
+        )
+        # The configured timeout bounds connecting and each socket read, not a
+        # whole transfer, whose length depends on the configured sizes; ping
+        # requests pass their own total=5
+        timeout_config = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
         
-        if not quick_mode:
-            print("Testing upload speed...", type_="INFO")
-            upload_speed = await test_upload(server["upload_url"], upload_size, connections)
-            results["upload"] = upload_speed
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout_config) as session:
+                print("Testing ping...", type_="INFO")
+                avg_ping, jitter = await test_ping(session, server["ping_url"])
+                results["ping"] = avg_ping
+                results["jitter"] = jitter
+                
+                print("Testing download speed...", type_="INFO")
+                download_speed = await test_download(session, server["download_url"], download_size, connections)
+                results["download"] = download_speed
+                
+                if not quick_mode:
+                    print("Testing upload speed...", type_="INFO")
+                    upload_speed = await test_upload(session, server["upload_url"], upload_size, connections)
+                    results["upload"] = upload_speed
+        finally:
+            if resolver is not None:
+                await resolver.close()
         
         return results
     
     # ============================================================================
-    # COMMANDS
+    # RESPONSE TEMPLATES
     # ============================================================================
     
-    @bot.command(
-        name="speedtest",
-        aliases=["st"],
-        usage="[quick|server|config|history] [args]",
-        description="Run network speed test or manage settings"
-    )
-    async def speedtest_command(ctx, *, args: str = ""):
-        await ctx.message.delete()
-        
-        parts = args.strip().split(maxsplit=1)
-        subcommand = parts[0].lower() if parts else ""
-        subargs = parts[1] if len(parts) > 1 else ""
-        
-        if subcommand == "quick":
-            msg = await ctx.send("🚀 Running quick speed test...", silent=True)
-            
-            try:
-                results = await run_full_speedtest(quick_mode=True)
-                
-                history = load_history()
-                history.append(results)
-                save_history(history)
-                
-                content = f"""# 🚀 Quick Speed Test Results
+    QUICK_RESULTS_TEMPLATE = """# 🚀 Quick Speed Test Results
 
-**Server:** {results['server']}
-**Time:** {datetime.fromisoformat(results['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}
+**Server:** {server}
+**Time:** {time}
 
 📊 **Results:**
 """
-                
-                if results['ping'] is not None:
-                    content += f"- **Ping:** {results['ping']:.1f} ms\n"
-                    if results['jitter'] is not None:
-                        content += f"- **Jitter:** {results['jitter']:.1f} ms\n"
-                
-                if results['download'] and results['download'] > 0:
-                    content += f"- **Download:** {format_speed(results['download'])}\n"
-                else:
-                    content += "- **Download:** Test failed\n"
-                
-                content += "\n> Quick mode: Upload test skipped"
-                
-                await msg.delete()
-                
-                current_private = getConfigData().get("private")
-                updateConfigData("private", False)
-                
-                try:
-                    await forwardEmbedMethod(
-                        channel_id=ctx.channel.id,
-                        content=content,
-                        title="⚡ Quick Speed Test"
-                    )
-                except Exception as embed_error:
-                    print(f"Embed send error: {embed_error}", type_="ERROR")
-                    await ctx.send(content)
-                finally:
-                    updateConfigData("private", current_private)
-                
-            except Exception as e:
-                await msg.edit(content=f"❌ Speed test failed: {str(e)}")
-                print(f"Speed test error: {e}", type_="ERROR")
-        
-        elif subcommand == "server":
-            server = TEST_SERVERS[0]
-            content = f"""# 🌐 Speed Test Server
+    
+    FULL_RESULTS_TEMPLATE = """# 🚀 Speed Test Results
 
-**Current Server:** {server['name']}
-**Download URL:** {server['download_url'][:60]}...
-**Ping URL:** {server['ping_url']}
-**Upload URL:** {server['upload_url']}
+**Server:** {server}
+**Time:** {time}
 
-**Configuration:**
-- Download Size: {getConfigData().get('speedtest_download_size_mb', 10)} MB
-- Upload Size: {getConfigData().get('speedtest_upload_size_mb', 5)} MB
-- Connections: {getConfigData().get('speedtest_connections', 3)}
-- Timeout: {getConfigData().get('speedtest_timeout', 15)}s
+📊 **Results:**
 """
+    
+    # ============================================================================
+    # COMMANDS
+    # ============================================================================
+    
+    async def handle_quick(ctx, cfg, args):
+        """Run a quick speed test (ping and download only)."""
+        msg = await ctx.send("🚀 Running quick speed test...", silent=True)
+        
+        try:
+            results = await run_full_speedtest(quick_mode=True)
+            
+            append_history(results)
+            
+            lines = [QUICK_RESULTS_TEMPLATE.format(
+                server=results['server'],
+                time=results['display_time']
+            )]
+            
+            if results['ping'] is not None:
+                lines.append(f"- **Ping:** {results['ping']:.1f} ms\n")
+                if results['jitter'] is not None:
+                    lines.append(f"- **Jitter:** {results['jitter']:.1f} ms\n")
+            
+            if results['download'] and results['download'] > 0:
+                lines.append(f"- **Download:** {format_speed(results['download'])}\n")
+            else:
+                lines.append("- **Download:** Test failed\n")
+            
+            lines.append("\n> Quick mode: Upload test skipped")
+            content = "".join(lines)
+            
+            await msg.delete()
             
             current_private = getConfigData().get("private")
             updateConfigData("private", False)
@@ -399,108 +500,154 @@ def speedtest_script():
             try:
                 await forwardEmbedMethod(
                     channel_id=ctx.channel.id,
-                    content=content
+                    content=content,
+                    title="⚡ Quick Speed Test"
                 )
-            except:
+            except Exception as embed_error:
+                print(f"Embed send error: {embed_error}", type_="ERROR")
                 await ctx.send(content)
             finally:
                 updateConfigData("private", current_private)
-        
-        elif subcommand == "config":
-            if not subargs:
-                await ctx.send("Usage: `<p>speedtest config <setting> <value>`\nSettings: size, upload, connections, timeout", silent=True)
-                return
             
-            config_parts = subargs.split(maxsplit=1)
-            if len(config_parts) != 2:
-                await ctx.send("Invalid config format. Use: `<p>speedtest config <setting> <value>`", silent=True)
-                return
-            
-            setting, value = config_parts
-            setting = setting.lower()
+        except Exception as e:
+            await msg.edit(content=f"❌ Speed test failed: {str(e)}")
+            print(f"Speed test error: {e}", type_="ERROR")
+    
+    async def handle_server(ctx, cfg, args):
+        """Show the current test server and settings."""
+        server = TEST_SERVERS[0]
+        content = f"""# 🌐 Speed Test Server
+
+**Current Server:** {server['name']}
+**Download URL:** {server['download_url'][:60]}...
+**Ping URL:** {server['ping_url']}
+**Upload URL:** {server['upload_url']}
+
+**Configuration:**
+- Download Size: {cfg.get('speedtest_download_size_mb', 10)} MB
+- Upload Size: {cfg.get('speedtest_upload_size_mb', 5)} MB
+- Connections: {cfg.get('speedtest_connections', 3)}
+- Timeout: {cfg.get('speedtest_timeout', 15)}s
+"""
+        
+        current_private = cfg.get("private")
+        updateConfigData("private", False)
+        
+        try:
+            await forwardEmbedMethod(
+                channel_id=ctx.channel.id,
+                content=content
+            )
+        except:
+            await ctx.send(content)
+        finally:
+            updateConfigData("private", current_private)
+    
+    async def handle_config(ctx, cfg, args):
+        """Handle configuration subcommand."""
+        prefix = cfg.get('prefix', '<p>')
+        if not args:
+            await ctx.send(f"Usage: `{prefix}speedtest config <setting> <value>`\nSettings: size, upload, connections, timeout", silent=True)
+            return
+        
+        config_parts = args.split(maxsplit=1)
+        if len(config_parts) != 2:
+            await ctx.send(f"Invalid config format. Use: `{prefix}speedtest config <setting> <value>`", silent=True)
+            return
+        
+        setting, value = config_parts
+        setting = setting.lower()
+        
+        try:
+            value = int(value)
             
-            try:
-                value = int(value)
-                
-                if setting in ["size", "download"]:
-                    if 1 <= value <= 50:
-                        updateConfigData("speedtest_download_size_mb", value)
-                        await ctx.send(f"✅ Download test size set to {value} MB", silent=True)
-                    else:
-                        await ctx.send("❌ Download size must be between 1 and 50 MB", silent=True)
-                
-                elif setting == "upload":
-                    if 1 <= value <= 25:
-                        updateConfigData("speedtest_upload_size_mb", value)
-                        await ctx.send(f"✅ Upload test size set to {value} MB", silent=True)
-                    else:
-                        await ctx.send("❌ Upload size must be between 1 and 25 MB", silent=True)
-                
-                elif setting in ["connections", "conn"]:
-                    if 1 <= value <= 5:
-                        updateConfigData("speedtest_connections", value)
-                        await ctx.send(f"✅ Concurrent connections set to {value}", silent=True)
-                    else:
-                        await ctx.send("❌ Connections must be between 1 and 5", silent=True)
-                
-                elif setting == "timeout":
-                    if 10 <= value <= 60:
-                        updateConfigData("speedtest_timeout", value)
-                        await ctx.send(f"✅ Timeout set to {value} seconds", silent=True)
-                    else:
-                        await ctx.send("❌ Timeout must be between 10 and 60 seconds", silent=True)
-                
+            if setting in ["size", "download"]:
+                if 1 <= value <= 50:
+                    updateConfigData("speedtest_download_size_mb", value)
+                    await ctx.send(f"✅ Download test size set to {value} MB", silent=True)
                 else:
-                    await ctx.send(f"❌ Unknown setting: {setting}", silent=True)
+                    await ctx.send("❌ Download size must be between 1 and 50 MB", silent=True)
             
-            except ValueError:
-                await ctx.send("❌ Value must be a number", silent=True)
-        
-        elif subcommand == "history":
-            history = load_history()
+            elif setting == "upload":
+                if 1 <= value <= 25:
+                    updateConfigData("speedtest_upload_size_mb", value)
+                    await ctx.send(f"✅ Upload test size set to {value} MB", silent=True)
+                else:
+                    await ctx.send("❌ Upload size must be between 1 and 25 MB", silent=True)
             
-            if not history:
-                await ctx.send("No speed test history available.", silent=True)
-                return
+            elif setting in ["connections", "conn"]:
+                if 1 <= value <= 5:
+                    updateConfigData("speedtest_connections", value)
+                    await ctx.send(f"✅ Concurrent connections set to {value}", silent=True)
+                else:
+                    await ctx.send("❌ Connections must be between 1 and 5", silent=True)
             
-            recent = history[-5:]
-            content = "# 📊 Speed Test History\n\n"
+            elif setting == "timeout":
+                if 10 <= value <= 60:
+                    updateConfigData("speedtest_timeout", value)
+                    await ctx.send(f"✅ Timeout set to {value} seconds", silent=True)
+                else:
+                    await ctx.send("❌ Timeout must be between 10 and 60 seconds", silent=True)
             
-            for i, result in enumerate(reversed(recent), 1):
-                timestamp = datetime.fromisoformat(result['timestamp']).strftime('%m/%d %H:%M')
-                content += f"**{i}. {timestamp}** - {result['server']}\n"
-                
-                if result.get('ping'):
-                    content += f"   Ping: {result['ping']:.1f}ms"
-                if result.get('download'):
-                    content += f" | Down: {format_speed(result['download'])}"
-                if result.get('upload'):
-                    content += f" | Up: {format_speed(result['upload'])}"
-                
-                content += "\n\n"
+            else:
+                await ctx.send(f"❌ Unknown setting: {setting}", silent=True)
+        
+        except ValueError:
+            await ctx.send("❌ Value must be a number", silent=True)
+    
+    async def handle_history(ctx, cfg, args):
+        """Show the most recent speed test results."""
+        recent = load_history(5)
+        
+        if not recent:
+            await ctx.send("No speed test history available.", silent=True)
+            return
+        
+        content = "# 📊 Speed Test History\n\n"
+        fromiso = datetime.fromisoformat
+        
+        for i, result in enumerate(reversed(recent), 1):
+            # "YYYY-MM-DD HH:MM:SS" -> "MM/DD HH:MM"; older entries only have the ISO timestamp
+            display_time = result.get('display_time')
+            if display_time:
+                timestamp = f"{display_time[5:10].replace('-', '/')} {display_time[11:16]}"
+            else:
+                timestamp = fromiso(result['timestamp']).strftime('%m/%d %H:%M')
+            content += f"**{i}. {timestamp}** - {result['server']}\n"
             
-            current_private = getConfigData().get("private")
-            updateConfigData("private", False)
+            if result.get('ping'):
+                content += f"   Ping: {result['ping']:.1f}ms"
+            if result.get('download'):
+                content += f" | Down: {format_speed(result['download'])}"
+            if result.get('upload'):
+                content += f" | Up: {format_speed(result['upload'])}"
             
-            try:
-                await forwardEmbedMethod(
-                    channel_id=ctx.channel.id,
-                    content=content
-                )
-            except:
-                await ctx.send(content)
-            finally:
-                updateConfigData("private", current_private)
+            content += "\n\n"
+        
+        current_private = cfg.get("private")
+        updateConfigData("private", False)
         
-        elif subcommand in ["help", "?"] or (subcommand and subcommand not in ["quick", "server", "config", "history"]):
-            help_text = f"""# 🚀 Speed Test Help
+        try:
+            await forwardEmbedMethod(
+                channel_id=ctx.channel.id,
+                content=content
+            )
+        except:
+            await ctx.send(content)
+        finally:
+            updateConfigData("private", current_private)
+    
+    async def show_speedtest_help(ctx, cfg, args):
+        """Show speed test usage."""
+        prefix = cfg.get('prefix', '<p>')
+        help_text = f"""# 🚀 Speed Test Help
 
 **Usage:**
-`{getConfigData().get('prefix', '<p>')}speedtest` - Run full speed test
-`{getConfigData().get('prefix', '<p>')}speedtest quick` - Quick test (no upload)
-`{getConfigData().get('prefix', '<p>')}speedtest server` - Server information
-`{getConfigData().get('prefix', '<p>')}speedtest config <setting> <value>` - Configure
-`{getConfigData().get('prefix', '<p>')}speedtest history` - View history
+`{prefix}speedtest` - Run full speed test
+`{prefix}speedtest quick` - Quick test (no upload)
+`{prefix}speedtest server` - Server information
+`{prefix}speedtest config <setting> <value>` - Configure
+`{prefix}speedtest history` - View history
 
 **Config Settings:**
 - `size` or `download` - Download test size (1-50 MB)
@@ -509,10 +656,70 @@ def speedtest_script():
 - `timeout` - Request timeout (10-60 seconds)
 
 **Examples:**
-`{getConfigData().get('prefix', '<p>')}speedtest`
-`{getConfigData().get('prefix', '<p>')}speedtest quick`
-`{getConfigData().get('prefix', '<p>')}speedtest config size 10`
+`{prefix}speedtest`
+`{prefix}speedtest quick`
+`{prefix}speedtest config size 10`
 """
+        
+        current_private = cfg.get("private")
+        updateConfigData("private", False)
+        
+        try:
+            await forwardEmbedMethod(
+                channel_id=ctx.channel.id,
+                content=help_text
+            )
+        except:
+            await ctx.send(help_text)
+        finally:
+            updateConfigData("private", current_private)
+    
+    async def handle_full(ctx, cfg, args):
+        """Run a full speed test (ping, download and upload)."""
+        msg = await ctx.send("🚀 Running full speed test... This may take 30-60 seconds.", silent=True)
+        
+        try:
+            results = await run_full_speedtest(quick_mode=False)
+            
+            append_history(results)
+            
+            lines = [FULL_RESULTS_TEMPLATE.format(
+                server=results['server'],
+                time=results['display_time']
+            )]
+            
+            if results['ping'] is not None:
+                lines.append(f"- **Ping:** {results['ping']:.1f} ms")
+                if results['jitter'] is not None:
+                    lines.append(f" (Jitter: {results['jitter']:.1f} ms)")
+                lines.append("\n")
+            
+            if results['download'] and results['download'] > 0:
+                lines.append(f"- **Download:** {format_speed(results['download'])}\n")
+            else:
+                lines.append("- **Download:** Test failed\n")
+            
+            if results['upload'] and results['upload'] > 0:
+                lines.append(f"- **Upload:** {format_speed(results['upload'])}\n")
+            else:
+                lines.append("- **Upload:** Test failed\n")
+            
+            if results['download'] and results['download'] > 0:
+                mbps = (results['download'] * 8) / (1024 * 1024)
+                if mbps > 100:
+                    quality = "🟢 Excellent"
+                elif mbps > 50:
+                    quality = "🟡 Good"
+                elif mbps > 25:
+                    quality = "🟠 Fair"
+                else:
+                    quality = "🔴 Poor"
+                
+                lines.append(f"\n**Connection Quality:** {quality}")
+            
+            content = "".join(lines)
+            
+            await msg.delete()
             
             current_private = getConfigData().get("private")
             updateConfigData("private", False)
@@ -520,80 +727,45 @@ def speedtest_script():
             try:
                 await forwardEmbedMethod(
                     channel_id=ctx.channel.id,
-                    content=help_text
+                    content=content,
+                    title="⚡ Full Speed Test"
                 )
-            except:
-                await ctx.send(help_text)
+            except Exception as embed_error:
+                print(f"Embed send error: {embed_error}", type_="ERROR")
+                await ctx.send(content)
             finally:
                 updateConfigData("private", current_private)
-        
-        else:
-            msg = await ctx.send("🚀 Running full speed test... This may take 30-60 seconds.", silent=True)
             
-            try:
-                results = await run_full_speedtest(quick_mode=False)
-                
-                history = load_history()
-                history.append(results)
-                save_history(history)
-                
-                content = f"""# 🚀 Speed Test Results
-
-**Server:** {results['server']}
-**Time:** {datetime.fromisoformat(results['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}
-
-📊 **Results:**
-"""
-                
-                if results['ping'] is not None:
-                    content += f"- **Ping:** {results['ping']:.1f} ms"
-                    if results['jitter'] is not None:
-                        content += f" (Jitter: {results['jitter']:.1f} ms)"
-                    content += "\n"
-                
-                if results['download'] and results['download'] > 0:
-                    content += f"- **Download:** {format_speed(results['download'])}\n"
-                else:
-                    content += "- **Download:** Test failed\n"
-                
-                if results['upload'] and results['upload'] > 0:
-                    content += f"- **Upload:** {format_speed(results['upload'])}\n"
-                else:
-                    content += "- **Upload:** Test failed\n"
-                
-                if results['download'] and results['download'] > 0:
-                    mbps = (results['download'] * 8) / (1024 * 1024)
-                    if mbps > 100:
-                        quality = "🟢 Excellent"
-                    elif mbps > 50:
-                        quality = "🟡 Good"
-                    elif mbps > 25:
-                        quality = "🟠 Fair"
-                    else:
-                        quality = "🔴 Poor"
-                    
-                    content += f"\n**Connection Quality:** {quality}"
-                
-                await msg.delete()
-                
-                current_private = getConfigData().get("private")
-                updateConfigData("private", False)
-                
-                try:
-                    await forwardEmbedMethod(
-                        channel_id=ctx.channel.id,
-                        content=content,
-                        title="⚡ Full Speed Test"
-                    )
-                except Exception as embed_error:
-                    print(f"Embed send error: {embed_error}", type_="ERROR")
-                    await ctx.send(content)
-                finally:
-                    updateConfigData("private", current_private)
-                
-            except Exception as e:
-                await msg.edit(content=f"❌ Speed test failed: {str(e)}")
-                print(f"Speed test error: {e}", type_="ERROR")
+        except Exception as e:
+            await msg.edit(content=f"❌ Speed test failed: {str(e)}")
+            print(f"Speed test error: {e}", type_="ERROR")
+    
+    SUBCOMMAND_HANDLERS = {
+        "": handle_full,
+        "quick": handle_quick,
+        "server": handle_server,
+        "config": handle_config,
+        "history": handle_history,
+        "help": show_speedtest_help,
+        "?": show_speedtest_help
+    }
+    
+    @bot.command(
+        name="speedtest",
+        aliases=["st"],
+        usage="[quick|server|config|history] [args]",
+        description="Run network speed test or manage settings"
+    )
+    async def speedtest_command(ctx, *, args: str = ""):
+        await ctx.message.delete()
+        
+        cfg = getConfigData()
+        parts = args.strip().split(maxsplit=1)
+        subcommand = parts[0].lower() if parts else ""
+        subargs = parts[1] if len(parts) > 1 else ""
+        
+        handler = SUBCOMMAND_HANDLERS.get(subcommand, show_speedtest_help)
+        await handler(ctx, cfg, subargs)
     
     print("Speed Test script loaded successfully!", type_="SUCCESS")
 